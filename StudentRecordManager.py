@@ -2,9 +2,12 @@ import json
 import logging
 import os
 
+from instrumentation import BYTES_READ, BYTES_WRITTEN, count, instrument
+
 logging.basicConfig(filename="records.log", level=logging.INFO)
 
 
+@instrument("load_students")
 def load_students():
     """
     Load student records from JSON file.
@@ -17,6 +20,7 @@ def load_students():
     try:
         with open("student_records.json", "r", encoding="utf-8") as file:
             students = json.load(file)
+            count(BYTES_READ, "load_students", file.tell())
         logging.info("Loaded student records from student_records.json")
         return students
     except FileNotFoundError:
@@ -27,6 +31,7 @@ def load_students():
         return []
 
 
+@instrument("save_students")
 def save_students(students):
     """
     Save student records to JSON file.
@@ -39,6 +44,7 @@ def save_students(students):
     try:
         with open("student_records.json", "w", encoding="utf-8") as file:
             json.dump(students, file, indent=4)
+            count(BYTES_WRITTEN, "save_students", file.tell())
         logging.info("Saved student records to student_records.json")
     except Exception as e:
         logging.error(f"Failed to save data: {e}")
@@ -133,14 +139,15 @@ def update_student(key, age=None, grade=None):
         logging.error(f"Exception occurred: {e}")
 
 
-add_student("Sansa", 25, 59.0, 13)
-add_student("Jon", 12, 69.0, 14)
-add_student("Samuel", 32, 90.0, 154)
-add_student("Arya", 25, 19.0, 123)
-add_student("Manish", 27, 99.0, 114)
-add_student("Pratik", 23, 90.0, 4)
+if __name__ == "__main__":
+    add_student("Sansa", 25, 59.0, 13)
+    add_student("Jon", 12, 69.0, 14)
+    add_student("Samuel", 32, 90.0, 154)
+    add_student("Arya", 25, 19.0, 123)
+    add_student("Manish", 27, 99.0, 114)
+    add_student("Pratik", 23, 90.0, 4)
 
-print(search_student(123))
+    print(search_student(123))
 
-update_student(123, age=26, grade=95.0)
-print(search_student(123))
+    update_student(123, age=26, grade=95.0)
+    print(search_student(123))
@@ -0,0 +1,52 @@
+"""
+This program has unit testing for the benchmark regression gate
+"""
+from benchmarks import check_baseline, find_regressions
+import unittest
+
+class TestRegressionGate(unittest.TestCase):
+
+    baseline = {
+        "search_log": {"seconds": 1.0, "peak_alloc_bytes": 1000},
+        "get_total_revenue": {"seconds": 0.0001, "peak_alloc_bytes": 0},
+    }
+
+    def test_within_threshold(self):
+        results = {"search_log": {"seconds": 1.1, "peak_alloc_bytes": 1100}}
+        self.assertEqual(find_regressions(results, self.baseline, 0.2,
+                                          only=["search_log"]), [])
+
+    def test_slower_and_larger(self):
+        results = {"search_log": {"seconds": 1.5, "peak_alloc_bytes": 2000}}
+        regressions = find_regressions(results, self.baseline, 0.2,
+                                       only=["search_log"])
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("search_log seconds"))
+
+    def test_tiny_timings_and_new_benchmarks_not_gated(self):
+        results = {
+            "search_log": {"seconds": 1.0, "peak_alloc_bytes": 1000},
+            "get_total_revenue": {"seconds": 0.0009, "peak_alloc_bytes": 0},
+            "snapshot_menus": {"seconds": 5.0, "peak_alloc_bytes": 10**9},
+        }
+        self.assertEqual(find_regressions(results, self.baseline, 0.2), [])
+
+    def test_missing_benchmarks(self):
+        results = {"search_log": {"seconds": 1.0, "peak_alloc_bytes": 1000}}
+        self.assertEqual(find_regressions(results, self.baseline, 0.2),
+                         ["get_total_revenue: missing from this run"])
+        self.assertEqual(find_regressions(results, self.baseline, 0.2,
+                                          only=["search_log"]), [])
+
+    def test_scale_mismatch(self):
+        with self.assertRaises(ValueError):
+            check_baseline({"scale": 1.0, "python": "3.11.7"},
+                           {"scale": 0.01, "python": "3.11.7"})
+
+    def test_python_mismatch_warns(self):
+        warnings = check_baseline({"scale": 1.0, "python": "3.12.1"},
+                                  {"scale": 1.0, "python": "3.11.7"})
+        self.assertEqual(len(warnings), 1)
+
+if __name__=='__main__':
+    unittest.main()
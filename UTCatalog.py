@@ -0,0 +1,69 @@
+"""
+This program has unit testing for the item catalog
+"""
+from catalog import Catalog
+from ecommerce import Product, ShoppingCart
+from food_delivery_system import FoodItem, Restaurant
+import unittest
+
+class TestCatalog(unittest.TestCase):
+
+    def test_equal_items_share_sku(self):
+        catalog = Catalog()
+        first = catalog.add(FoodItem("Pizza", 12))
+        second = catalog.add(FoodItem("Pizza", 12))
+        self.assertEqual(first, second)
+        self.assertEqual(len(catalog), 1)
+
+    def test_skus_are_stable(self):
+        catalog = Catalog()
+        burger = catalog.add(FoodItem("Burger", 8))
+        pizza = catalog.add(FoodItem("Pizza", 12))
+        self.assertEqual((burger, pizza), (0, 1))
+        self.assertEqual(catalog.item(pizza), FoodItem("Pizza", 12))
+        self.assertEqual(catalog.prices[pizza], 12)
+
+    def test_menu_merges_equal_items(self):
+        restaurant = Restaurant("Tasty Bites")
+        restaurant.add_to_menu(FoodItem("Pizza", 12), 2)
+        restaurant.add_to_menu(FoodItem("Pizza", 12), 3)
+        self.assertEqual(len(restaurant.menu), 1)
+        self.assertEqual(restaurant.get_total_revenue(), 60)
+
+    def test_counts_and_total_price(self):
+        catalog = Catalog()
+        cart = {FoodItem("Burger", 8): 2, FoodItem("Pizza", 12): 3}
+        counts = catalog.to_counts(cart)
+        self.assertEqual(counts, {0: 2, 1: 3})
+        self.assertEqual(catalog.total_price(counts), 52)
+
+    def test_cart_total_ignores_stock(self):
+        totals = []
+        for stocks in [(2, 5), (5, 2)]:
+            cart = ShoppingCart()
+            for stock in stocks:
+                cart.add_product(Product("Keyboard", 50, stock), 1)
+            self.assertEqual(len(cart.products), 1)
+            totals.append(cart.get_total_cart_price())
+        self.assertEqual(totals, [100, 100])
+
+    def test_hashed_fields_are_read_only(self):
+        restaurant = Restaurant("Tasty Bites")
+        pizza = FoodItem("Pizza", 12)
+        restaurant.add_to_menu(pizza, 2)
+        with self.assertRaises(AttributeError):
+            pizza.price = 15
+        restaurant.remove_from_menu(pizza, 2)
+        self.assertEqual(restaurant.menu, {})
+        keyboard = Product("Keyboard", 50, 2)
+        with self.assertRaises(AttributeError):
+            keyboard.name = "Mouse"
+        keyboard.update_quantity(5)
+        self.assertEqual(keyboard.quantity, 5)
+
+    def test_unknown_item(self):
+        with self.assertRaises(KeyError):
+            Catalog().sku(FoodItem("Pasta", 10))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+This program has unit testing for the food delivery menu analytics
+"""
+from food_delivery_system import DeliveryService, FoodItem, Restaurant
+import unittest
+
+class TestDeliveryAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.burger = FoodItem("Burger", 8)
+        self.pizza = FoodItem("Pizza", 12)
+        self.pasta = FoodItem("Pasta", 10)
+        tasty = Restaurant("Tasty Bites")
+        tasty.add_to_menu(self.burger, 10)
+        tasty.add_to_menu(self.pizza, 5)
+        spice = Restaurant("Spice Delight")
+        spice.add_to_menu(self.pizza, 8)
+        spice.add_to_menu(self.pasta, 12)
+        self.service = DeliveryService()
+        self.service.add_restaurant(tasty)
+        self.service.add_restaurant(spice)
+
+    def test_total_revenue(self):
+        self.assertEqual(self.service.get_total_revenue(), 140 + 216)
+
+    def test_revenue_and_stock_by_restaurant(self):
+        snapshot = self.service.snapshot_menus()
+        self.assertEqual(snapshot.revenue_by("restaurant").tolist(), [140, 216])
+        self.assertEqual(snapshot.stock_by("restaurant").tolist(), [15, 20])
+
+    def test_revenue_and_stock_by_item(self):
+        snapshot = self.service.snapshot_menus()
+        catalog = self.service.catalog
+        revenue = snapshot.revenue_by("item")
+        stock = snapshot.stock_by("item")
+        self.assertEqual(revenue[catalog.sku(self.pizza)], 156)
+        self.assertEqual(stock[catalog.sku(self.pizza)], 13)
+        self.assertEqual(revenue[catalog.sku(self.burger)], 80)
+
+    def test_top_items(self):
+        snapshot = self.service.snapshot_menus()
+        sku = self.service.catalog.sku
+        self.assertEqual(snapshot.top_items(2),
+                         [(sku(self.pizza), 156), (sku(self.pasta), 120)])
+        self.assertEqual(snapshot.top_items(5, restaurant_id=0),
+                         [(sku(self.burger), 80), (sku(self.pizza), 60)])
+
+    def test_top_items_ties_go_to_lowest_sku(self):
+        restaurant = Restaurant("Ties")
+        for i in range(6):
+            restaurant.add_to_menu(FoodItem(f"Dish {i}", 10), 1 if i else 2)
+        service = DeliveryService()
+        service.add_restaurant(restaurant)
+        snapshot = service.snapshot_menus()
+        self.assertEqual(snapshot.top_items(3), [(0, 20), (1, 10), (2, 10)])
+
+    def test_empty_fleet(self):
+        snapshot = DeliveryService().snapshot_menus()
+        self.assertEqual(snapshot.revenue_by().tolist(), [])
+        self.assertEqual(snapshot.top_items(3), [])
+        self.assertEqual(DeliveryService().get_total_revenue(), 0)
+
+    def test_unknown_group(self):
+        with self.assertRaises(ValueError):
+            self.service.snapshot_menus().revenue_by("customer")
+
+    def test_revenue_counter_resets_on_empty_menu(self):
+        restaurant = Restaurant("Floats")
+        food_item = FoodItem("Chips", 0.1)
+        for _ in range(3):
+            restaurant.add_to_menu(food_item, 1)
+        restaurant.remove_from_menu(food_item, 1)
+        restaurant.remove_from_menu(food_item, 5)
+        self.assertEqual(restaurant.get_total_revenue(), 0)
+
+    def test_recalculate_after_direct_menu_change(self):
+        restaurant = Restaurant("Direct")
+        restaurant.add_to_menu(self.pasta, 2)
+        restaurant.menu[self.pasta] = 4
+        self.assertEqual(restaurant.recalculate_revenue(), 40)
+        self.assertEqual(restaurant.get_total_revenue(), 40)
+
+    def test_find_restaurant_after_removal(self):
+        tasty = self.service.find_restaurant_by_name("Tasty Bites")
+        self.assertIs(self.service.find_restaurant_by_name("Tasty Bites"), tasty)
+        self.service.restaurants.remove(tasty)
+        self.assertIsNone(self.service.find_restaurant_by_name("Tasty Bites"))
+        self.assertEqual(self.service.find_restaurant_by_name("Spice Delight").name,
+                         "Spice Delight")
+
+    def test_find_restaurant_after_rename(self):
+        tasty = self.service.restaurants[0]
+        tasty.name = "Tastier Bites"
+        self.assertIsNone(self.service.find_restaurant_by_name("Tasty Bites"))
+        self.assertIs(self.service.find_restaurant_by_name("Tastier Bites"), tasty)
+
+    def test_find_restaurant_returns_first_match(self):
+        tasty, spice = self.service.restaurants
+        self.assertIs(self.service.find_restaurant_by_name("Spice Delight"), spice)
+        tasty.name = "Spice Delight"
+        self.assertIs(self.service.find_restaurant_by_name("Spice Delight"), tasty)
+
+if __name__=='__main__':
+    unittest.main()
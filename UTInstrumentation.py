@@ -0,0 +1,75 @@
+"""
+This program has unit testing for the hot-path instrumentation
+"""
+import instrumentation
+from instrumentation import (CACHE_HITS, Histogram, _bucket_index,
+                             _bucket_upper_bound, instrument)
+import json
+import unittest
+
+@instrument("double")
+def double(value):
+    return value * 2
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.METRICS.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.METRICS.reset()
+
+    def test_buckets_contain_their_values(self):
+        for value in list(range(100)) + [10**3, 12345, 10**6, 10**9 + 7]:
+            index = _bucket_index(value)
+            self.assertLessEqual(value, _bucket_upper_bound(index))
+            if index > 0:
+                self.assertGreater(value, _bucket_upper_bound(index - 1))
+
+    def test_quantile(self):
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.quantile(0.5), 500, delta=500 * 0.125)
+        self.assertEqual(histogram.quantile(1.0), 1000)
+
+    def test_disabled_records_nothing(self):
+        self.assertEqual(double(2), 4)
+        instrumentation.count(CACHE_HITS, "double")
+        self.assertEqual(instrumentation.METRICS.to_dict(), {})
+
+    def test_enabled_records_calls_and_counters(self):
+        instrumentation.enable()
+        for value in range(3):
+            double(value)
+        instrumentation.count(CACHE_HITS, "double", 2)
+        snapshot = json.loads(json.dumps(instrumentation.METRICS.to_dict()))
+        self.assertEqual(snapshot["double"]["calls"], 3)
+        self.assertEqual(snapshot["double"][CACHE_HITS], 2)
+
+    def test_prometheus_export(self):
+        instrumentation.enable()
+        double(1)
+        with instrumentation.timer("block"):
+            double(2)
+        text = instrumentation.METRICS.to_prometheus()
+        self.assertIn('app_call_latency_seconds_count{name="double"} 2', text)
+        self.assertIn('app_call_latency_seconds_bucket{name="block",le="+Inf"} 1',
+                      text)
+
+    def test_prometheus_buckets_share_layout(self):
+        instrumentation.METRICS.observe("fast", 10)
+        instrumentation.METRICS.observe("slow", 5000)
+        text = instrumentation.METRICS.to_prometheus()
+        layouts = {}
+        for line in text.splitlines():
+            if "_bucket{" in line:
+                name = line.split('name="')[1].split('"')[0]
+                layouts.setdefault(name, []).append(line.split('le="')[1].split('"')[0])
+        self.assertEqual(layouts["fast"], layouts["slow"])
+        self.assertIn("+Inf", layouts["fast"])
+
+if __name__=='__main__':
+    unittest.main()
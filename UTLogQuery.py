@@ -0,0 +1,65 @@
+"""
+This program has unit testing for structured log queries
+"""
+from datetime import datetime
+from old_tasks.FileIO.log_query import (FORMATS, count_by_level_per_minute,
+                                        detect_format, find_offset, query_log)
+import os
+import tempfile
+import unittest
+
+class TestLogQuery(unittest.TestCase):
+
+    def setUp(self):
+        lines = [f"2024-04-15 17:{minute:02d}:{second:02d},000:"
+                 f"{'ERROR' if second % 20 == 0 else 'INFO'}:Event {minute} {second}"
+                 for minute in range(10) for second in range(0, 60, 10)]
+        handle, self.logfile = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        os.remove(self.logfile)
+
+    def test_detect_format(self):
+        self.assertIs(detect_format(self.logfile), FORMATS["ecommerce"])
+
+    def test_parse_formats(self):
+        record = FORMATS["password_strength"].parse(
+            "[2024-04-16 09:41:06,857] - [ERROR] - Too short password!")
+        self.assertEqual(record, (datetime(2024, 4, 16, 9, 41, 6, 857000),
+                                  "ERROR", None, "Too short password!"))
+        record = FORMATS["plain"].parse("2022-04-01 10:20:12 - ERROR - Connection failed.")
+        self.assertEqual(record[0], datetime(2022, 4, 1, 10, 20, 12))
+        record = FORMATS["basic"].parse("INFO:root:Loaded student records")
+        self.assertEqual(record, (None, "INFO", "root", "Loaded student records"))
+
+    def test_find_offset(self):
+        offset = find_offset(self.logfile, datetime(2024, 4, 15, 17, 3, 5))
+        with open(self.logfile, "rb") as file:
+            file.seek(offset)
+            self.assertTrue(file.readline().startswith(b"2024-04-15 17:03:10"))
+        after_end = find_offset(self.logfile, datetime(2025, 1, 1))
+        self.assertEqual(after_end, os.path.getsize(self.logfile))
+        self.assertEqual(find_offset(self.logfile, datetime(2020, 1, 1)), 0)
+
+    def test_query_time_range_and_level(self):
+        records = query_log(self.logfile, levels=["error"],
+                            start=datetime(2024, 4, 15, 17, 2),
+                            end=datetime(2024, 4, 15, 17, 4))
+        self.assertEqual(len(records), 6)
+        self.assertEqual(set(records.levels), {"ERROR"})
+        self.assertEqual(records.messages[0], "Event 2 0")
+
+    def test_count_by_level_per_minute(self):
+        counts = count_by_level_per_minute(self.logfile)
+        minute = datetime(2024, 4, 15, 17, 5)
+        self.assertEqual(counts[minute, "ERROR"], 3)
+        self.assertEqual(counts[minute, "INFO"], 3)
+
+    def test_no_timestamps(self):
+        with self.assertRaises(ValueError):
+            query_log(self.logfile, FORMATS["basic"], start=datetime(2024, 1, 1))
+
+if __name__=='__main__':
+    unittest.main()
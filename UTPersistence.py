@@ -0,0 +1,134 @@
+"""
+This program has unit testing for snapshot and event log persistence
+"""
+from catalog import Catalog
+from ecommerce import Product, ShoppingCart
+from food_delivery_system import DeliveryService, FoodItem, Restaurant
+from persistence import StateStore, load_snapshot, save_snapshot
+import numpy as np
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+class TestPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reopen(self, store):
+        store.close()
+        return StateStore(self.directory).recover()
+
+    def test_snapshot_round_trip(self):
+        path = os.path.join(self.directory, "snapshot.bin")
+        cart = ShoppingCart()
+        cart.add_product(Product("Keyboard", 50, 2), 3)
+        save_snapshot(path, {"cart": cart, "values": np.arange(10)}, seq=7)
+        state, seq = load_snapshot(path)
+        self.assertEqual(seq, 7)
+        self.assertEqual(state["cart"].products, {Product("Keyboard", 50, 2): 3})
+        self.assertEqual(state["values"].tolist(), list(range(10)))
+        # the copy-on-write map lets arrays change without touching the file
+        state["values"][0] = 5
+        self.assertEqual(load_snapshot(path)[0]["values"][0], 0)
+
+    def test_replay_keeps_stored_objects_shared(self):
+        store = StateStore(self.directory)
+        store.recover()
+        restaurant = Restaurant("Tasty Bites")
+        store.add("restaurant", restaurant)
+        delivery_service = DeliveryService()
+        delivery_service.add_restaurant(restaurant)
+        store.add("service", delivery_service)
+        store.add("other", DeliveryService())
+        store.apply("other", "add_restaurant", restaurant)
+        store.apply("restaurant", "add_to_menu", FoodItem("Pizza", 12), 3)
+        state = self.reopen(store)
+        self.assertIs(state["service"].restaurants[0], state["restaurant"])
+        self.assertIs(state["other"].restaurants[0], state["restaurant"])
+        self.assertEqual(state["service"].get_total_revenue(), 36)
+
+    def test_large_log_is_compacted(self):
+        store = StateStore(self.directory, fsync=False, max_log_bytes=4096)
+        store.recover()
+        store.add("cart", ShoppingCart())
+        for i in range(200):
+            product = Product(f"Product {i}", 1.0, 1)
+            store.apply("cart", "add_product", product, 1)
+            store.apply("cart", "remove_product", product, 1)
+        self.assertLess(os.path.getsize(store.log_path), 4096)
+        self.assertEqual(StateStore(self.directory).recover()["cart"].products, {})
+        store.close()
+
+    def test_replay_after_recover(self):
+        store = StateStore(self.directory)
+        store.recover()
+        store.add("cart", ShoppingCart())
+        store.apply("cart", "add_product", Product("Mouse", 30, 1), 1)
+        store = StateStore(self.directory)
+        store.recover()
+        store.apply("cart", "add_product", Product("Mouse", 30, 1), 2)
+        state = self.reopen(store)
+        self.assertEqual(state["cart"].products, {Product("Mouse", 30, 1): 3})
+
+    def test_events_in_snapshot_are_skipped(self):
+        store = StateStore(self.directory)
+        store.recover()
+        store.add("cart", ShoppingCart())
+        store.apply("cart", "add_product", Product("Mouse", 30, 1), 1)
+        with open(store.log_path, "rb") as file:
+            old_log = file.read()
+        store.snapshot()
+        store.close()
+        # a crash between writing the snapshot and emptying the log
+        with open(store.log_path, "wb") as file:
+            file.write(old_log)
+        state = StateStore(self.directory).recover()
+        self.assertEqual(state["cart"].products, {Product("Mouse", 30, 1): 1})
+
+    def test_torn_record_is_truncated(self):
+        store = StateStore(self.directory)
+        store.recover()
+        store.add("cart", ShoppingCart())
+        store.apply("cart", "add_product", Product("Mouse", 30, 1), 1)
+        store.close()
+        size = os.path.getsize(store.log_path)
+        with open(store.log_path, "ab") as file:
+            file.write(b"\x05\x00\x00")
+        with self.assertLogs("persistence", level="WARNING"):
+            state = StateStore(self.directory).recover()
+        self.assertEqual(os.path.getsize(store.log_path), size)
+        self.assertEqual(state["cart"].products, {Product("Mouse", 30, 1): 1})
+
+    def test_recover_required_before_changes(self):
+        store = StateStore(self.directory)
+        store.recover()
+        store.add("cart", ShoppingCart())
+        store.close()
+        with self.assertRaises(ValueError):
+            StateStore(self.directory).add("cart", ShoppingCart())
+
+    def test_catalog_pickles_in_and_out_of_band(self):
+        catalog = Catalog()
+        catalog.add(FoodItem("Burger", 8))
+        catalog.add(FoodItem("Pizza", 12))
+        buffers = []
+        payload = pickle.dumps(catalog, protocol=5,
+                               buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 1)
+        copies = [pickle.loads(payload, buffers=buffers),
+                  pickle.loads(pickle.dumps(catalog, protocol=5)),
+                  pickle.loads(pickle.dumps(catalog, protocol=4))]
+        for copy in copies:
+            self.assertEqual(list(copy.prices), [8, 12])
+            self.assertEqual(copy.sku(FoodItem("Pizza", 12)), 1)
+        catalog.add(FoodItem("Pasta", 10))
+        self.assertEqual(len(catalog), 3)
+
+if __name__=='__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import re
 
+from instrumentation import instrument
+
+@instrument("validate_email")
 def validate_email(email):
     """
     Validates an email address as:
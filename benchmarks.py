@@ -0,0 +1,542 @@
+"""
+Benchmark suite running the key operations of every module on large
+synthetic workloads.
+
+Each benchmark is timed, its allocations are traced and the growth of
+the peak RSS while it runs is recorded. Results are saved as JSON and can be compared
+with a stored baseline; the run fails when a benchmark regresses by more
+than the configured threshold.
+
+Usage::
+
+    python benchmarks.py --scale 0.01 --output results.json
+    python benchmarks.py --scale 0.01 --baseline results.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+import instrumentation
+
+# workload sizes at --scale 1
+NUM_STUDENTS = 1_000_000
+LOG_BYTES = 2 * 2**30
+NUM_STAT_VALUES = 10_000_000
+NUM_EMAILS = 2_000_000
+NUM_CART_LINES = 1_000_000
+NUM_RESTAURANTS = 10_000
+MENU_SIZE = 100
+
+# timings below this are too noisy to gate on
+MIN_GATED_SECONDS = 0.001
+
+LOG_LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARNING", "ERROR"]
+LOG_KEYWORD = "Authentication failed"
+
+
+def generate_students(count, seed=0):
+    """
+    Generates student records like the ones in student_records.json.
+
+    Parameters
+    ----------
+    count : int
+        Number of students.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+
+    Returns
+    -------
+    list
+        List of student records.
+    """
+    rng = random.Random(seed)
+    return [{"Name": "".join(rng.choices(string.ascii_letters, k=8)),
+             "Age": rng.randint(10, 40),
+             "Grade": round(rng.uniform(0, 100), 1),
+             "ID": student_id}
+            for student_id in range(count)]
+
+
+def generate_log(path, size, seed=0):
+    """
+    Writes a log file in the logfile.txt format.
+
+    One line in ten thousand contains ``LOG_KEYWORD``.
+
+    Parameters
+    ----------
+    path : str
+        Path of the log file.
+    size : int
+        Approximate size of the file in bytes.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+    """
+    rng = random.Random(seed)
+    start = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))
+    written = 0
+    line_number = 0
+    with open(path, "w", encoding="utf-8") as file:
+        while written < size:
+            chunk = []
+            for _ in range(10_000):
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S",
+                                      time.localtime(start + line_number))
+                if line_number % 10_000 == 0:
+                    message = LOG_KEYWORD
+                else:
+                    message = f"Request {rng.randrange(10**6)} processed."
+                chunk.append(f"{stamp} - {rng.choice(LOG_LEVELS)} - {message}\n")
+                line_number += 1
+            text = "".join(chunk)
+            file.write(text)
+            written += len(text)
+
+
+def generate_values(count, seed=0):
+    """
+    Generates a list of floats for calculate_stat.
+
+    Parameters
+    ----------
+    count : int
+        Number of values.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+
+    Returns
+    -------
+    list of float
+        The values.
+    """
+    rng = random.Random(seed)
+    return [rng.gauss(50, 10) for _ in range(count)]
+
+
+def generate_emails(count, seed=0):
+    """
+    Generates a mix of valid and invalid email addresses.
+
+    Parameters
+    ----------
+    count : int
+        Number of addresses.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+
+    Returns
+    -------
+    list of str
+        The addresses.
+    """
+    rng = random.Random(seed)
+    domains = ["gmail.com", "yahoo.com", "outlook.com", "example.com",
+               "outlook..com"]
+    emails = []
+    for _ in range(count):
+        user = "".join(rng.choices(string.ascii_lowercase + "._", k=10))
+        if rng.random() < 0.05:
+            user = user[:5] + " " + user[5:]
+        emails.append(f"{user}@{rng.choice(domains)}")
+    return emails
+
+
+def generate_cart(count):
+    """
+    Generates a shopping cart with one line per product.
+
+    Parameters
+    ----------
+    count : int
+        Number of cart lines.
+
+    Returns
+    -------
+    ShoppingCart
+        The filled cart.
+    """
+    from ecommerce import Product, ShoppingCart
+
+    cart = ShoppingCart()
+    for i in range(count):
+        cart.add_product(Product(f"Product {i}", float(i % 100 + 1), 1),
+                         i % 5 + 1)
+    return cart
+
+
+def generate_delivery_service(num_restaurants, menu_size, seed=0):
+    """
+    Generates a delivery service whose restaurants share a pool of items.
+
+    Parameters
+    ----------
+    num_restaurants : int
+        Number of restaurants.
+    menu_size : int
+        Number of food items on every menu.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+
+    Returns
+    -------
+    DeliveryService
+        The delivery service.
+    """
+    from food_delivery_system import DeliveryService, FoodItem, Restaurant
+
+    rng = random.Random(seed)
+    items = [FoodItem(f"Dish {i}", float(rng.randint(5, 30)))
+             for i in range(menu_size * 10)]
+    delivery_service = DeliveryService()
+    for i in range(num_restaurants):
+        restaurant = Restaurant(f"Restaurant {i}")
+        for food_item in rng.sample(items, menu_size):
+            restaurant.add_to_menu(food_item, rng.randint(1, 20))
+        delivery_service.add_restaurant(restaurant)
+    return delivery_service
+
+
+def build_benchmarks(scale, directory):
+    """
+    Returns the setup of every benchmark.
+
+    Workloads are only generated when the setup of a benchmark that uses
+    them runs, and are shared by the benchmarks that need the same data.
+
+    Parameters
+    ----------
+    scale : float
+        Factor applied to every workload size.
+    directory : str
+        Directory for generated files. Must be the working directory,
+        since StudentRecordManager uses relative paths.
+
+    Returns
+    -------
+    dict
+        Benchmark names mapped to setup functions. A setup function
+        generates the workload and returns the operation to measure.
+    """
+    from StudentRecordManager import load_students, save_students, search_student
+    from UnitTestEmailValidator import validate_email
+    from computeStat import calculate_stat
+    from old_tasks.FileIO.search_log_file import search_log
+
+    def size(count):
+        return max(1, int(count * scale))
+
+    @functools.cache
+    def students():
+        records = generate_students(size(NUM_STUDENTS))
+        # load_students and search_student read student_records.json
+        save_students(records)
+        return records
+
+    @functools.cache
+    def delivery_service():
+        return generate_delivery_service(size(NUM_RESTAURANTS), MENU_SIZE)
+
+    def load_students_setup():
+        students()
+        return load_students
+
+    def search_log_setup():
+        logfile = os.path.join(directory, "benchmark.log")
+        generate_log(logfile, size(LOG_BYTES))
+        return lambda: search_log(logfile, LOG_KEYWORD)
+
+    def calculate_stat_setup():
+        values = generate_values(size(NUM_STAT_VALUES))
+        return lambda: calculate_stat(values)
+
+    def validate_email_setup():
+        emails = generate_emails(size(NUM_EMAILS))
+        return lambda: sum(map(validate_email, emails))
+
+    def find_restaurant_setup():
+        service = delivery_service()
+        name = service.restaurants[-1].name
+        return lambda: service.find_restaurant_by_name(name)
+
+    return {
+        "save_students": lambda: functools.partial(save_students, students()),
+        "load_students": load_students_setup,
+        "search_student":
+            lambda: functools.partial(search_student, students()[-1]["ID"]),
+        "search_log": search_log_setup,
+        "calculate_stat": calculate_stat_setup,
+        "validate_email": validate_email_setup,
+        "get_total_cart_price":
+            lambda: generate_cart(size(NUM_CART_LINES)).get_total_cart_price,
+        "get_total_revenue": lambda: delivery_service().get_total_revenue,
+        "snapshot_menus":
+            lambda: lambda: delivery_service().snapshot_menus().revenue_by(),
+        "find_restaurant_by_name": find_restaurant_setup,
+    }
+
+
+def _read_proc_status(field):
+    with open("/proc/self/status", "r", encoding="ascii") as file:
+        for line in file:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+class PeakRSS:
+    """
+    Measures how much the peak RSS grows while a block runs, in KiB.
+
+    On Linux the kernel high-water mark is reset before the block, so the
+    result is the peak of the block itself. Elsewhere it is the growth of
+    the process high-water mark, which is 0 when an earlier block peaked
+    higher. Without the resource module (Windows) it is None.
+
+    Attributes
+    ----------
+    growth_kib : int or None
+        Growth of the peak RSS over the RSS before the block.
+    """
+    def __init__(self):
+        self.growth_kib = None
+        self._before = None
+        self._use_proc = False
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+                file.write("5")
+            self._before = _read_proc_status("VmRSS")
+            self._use_proc = True
+        except (OSError, KeyError):
+            if resource is not None:
+                self._before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._use_proc:
+            self.growth_kib = _read_proc_status("VmHWM") - self._before
+        elif self._before is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.growth_kib = peak - self._before
+        return False
+
+
+def measure(operation, repeat=3):
+    """
+    Measures one operation.
+
+    The operation is timed without tracing, keeping the best of
+    ``repeat`` runs, and run once more under tracemalloc, which slows it
+    down. Output printed by the operation is discarded.
+
+    Parameters
+    ----------
+    operation : callable
+        The operation to measure.
+    repeat : int, optional
+        Number of timed runs, by default 3.
+
+    Returns
+    -------
+    dict
+        Seconds taken, peak traced allocation in bytes and the growth of
+        the peak RSS during the timed runs in KiB (see PeakRSS).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = float("inf")
+        with PeakRSS() as peak_rss:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                operation()
+                seconds = min(seconds, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            operation()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": seconds, "peak_alloc_bytes": peak_bytes,
+            "peak_rss_growth_kib": peak_rss.growth_kib}
+
+
+def check_baseline(run, baseline_run):
+    """
+    Checks that a baseline was recorded under the same conditions.
+
+    Parameters
+    ----------
+    run : dict
+        This run, with its "scale" and "python" version.
+    baseline_run : dict
+        The saved baseline run.
+
+    Returns
+    -------
+    list of str
+        Warnings about differences that make comparisons less reliable.
+
+    Raises
+    ------
+    ValueError
+        If the workload scale differs, since results are not comparable.
+    """
+    if baseline_run.get("scale") != run["scale"]:
+        raise ValueError(f"Baseline scale {baseline_run.get('scale')} does "
+                         f"not match this run's scale {run['scale']}.")
+    warnings = []
+    if baseline_run.get("python") != run["python"]:
+        warnings.append(f"Baseline ran on Python {baseline_run.get('python')}, "
+                        f"this run on Python {run['python']}.")
+    return warnings
+
+
+def find_regressions(results, baseline, threshold, only=None):
+    """
+    Compares results with a baseline.
+
+    A baseline benchmark missing from the results counts as a regression,
+    so a run that skipped it cannot pass the gate.
+
+    Parameters
+    ----------
+    results : dict
+        Benchmark results of this run.
+    baseline : dict
+        Benchmark results of the baseline run.
+    threshold : float
+        Allowed relative increase, e.g. 0.2 for 20%.
+    only : list of str, optional
+        Names of the benchmarks that were selected to run, by default all.
+
+    Returns
+    -------
+    list of str
+        One message per regressed metric or missing benchmark.
+    """
+    regressions = [f"{name}: missing from this run" for name in baseline
+                   if name not in results and (not only or name in only)]
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("seconds", "peak_alloc_bytes"):
+            old, new = baseline[name][metric], metrics[metric]
+            if metric == "seconds" and old < MIN_GATED_SECONDS:
+                continue
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(f"{name} {metric}: {old:.6g} -> {new:.6g} "
+                                   f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="factor applied to every workload size")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="file to save the results to")
+    parser.add_argument("--baseline",
+                        help="results file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression, by default 0.2")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed runs per benchmark")
+    parser.add_argument("--only", nargs="*",
+                        help="names of the benchmarks to run")
+    parser.add_argument("--metrics",
+                        help="enable instrumentation and write the metrics "
+                             "to this .prom or .json file")
+    parser.add_argument("--profile",
+                        help="write sampled stacks in collapsed format "
+                             "to this file")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    metrics = os.path.abspath(args.metrics) if args.metrics else None
+    profile = os.path.abspath(args.profile) if args.profile else None
+    run = {"scale": args.scale, "python": sys.version.split()[0]}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline_run = json.load(file)
+        # fail before spending time on workloads that cannot be compared
+        try:
+            warnings = check_baseline(run, baseline_run)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+        for warning in warnings:
+            print(f"Warning: {warning}")
+        baseline = baseline_run["results"]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # the modules write their logs and data files to the working directory
+        os.chdir(directory)
+        try:
+            benchmarks = build_benchmarks(args.scale, directory)
+            unknown = sorted(set(args.only or ()) - benchmarks.keys())
+            if unknown:
+                print(f"Error: unknown benchmarks {', '.join(unknown)}; "
+                      f"choose from {', '.join(benchmarks)}.")
+                return 2
+            profiler = instrumentation.SamplingProfiler()
+            results = {}
+            for name, setup in benchmarks.items():
+                if args.only and name not in args.only:
+                    continue
+                # only the measured operations go into metrics and profiles
+                operation = setup()
+                if metrics:
+                    instrumentation.enable()
+                if profile:
+                    profiler.start()
+                try:
+                    results[name] = measure(operation, args.repeat)
+                finally:
+                    profiler.stop()
+                    instrumentation.disable()
+                print(f"{name}: {results[name]['seconds']:.4f}s, "
+                      f"peak {results[name]['peak_alloc_bytes'] / 2**20:.1f} MiB")
+        finally:
+            os.chdir(cwd)
+
+    if metrics and metrics.endswith(".prom"):
+        instrumentation.write_prometheus(metrics)
+    elif metrics:
+        instrumentation.write_json(metrics)
+    if profile:
+        profiler.write_collapsed(profile)
+
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(dict(run, results=results), file, indent=4)
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold,
+                                       args.only)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
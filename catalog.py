@@ -0,0 +1,194 @@
+"""
+Catalog that interns items by a stable integer SKU and keeps
+their prices in a compact array-backed column
+"""
+import pickle
+import tracemalloc
+from array import array
+
+
+class Catalog:
+    """
+    Interns catalog items so that equal items share one SKU.
+
+    SKUs are assigned in insertion order and never change, so they can
+    be used as compact keys for menus and carts.
+
+    Attributes
+    ----------
+    prices : array
+        Price of every item, indexed by SKU.
+
+    Quantities are not kept here; they live in the menus and carts.
+    """
+    def __init__(self):
+        self.prices = array("d")
+        self._items = []
+        self._skus = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._skus
+
+    def __reduce_ex__(self, protocol):
+        # protocol 5 lets the price column be written as an out-of-band
+        # buffer; it wraps a copy so a pickler that keeps its memo does
+        # not stop the array from growing
+        prices = self.prices.tobytes()
+        if protocol >= 5:
+            prices = pickle.PickleBuffer(prices)
+        return _restore_catalog, (self._items, prices)
+
+    def add(self, item):
+        """
+        Interns an item.
+
+        Parameters
+        ----------
+        item : FoodItem or Product
+            The item to intern. Items are matched by value.
+
+        Returns
+        -------
+        int
+            The SKU of the item.
+        """
+        sku = self._skus.get(item)
+        if sku is None:
+            sku = len(self._items)
+            self._skus[item] = sku
+            self._items.append(item)
+            self.prices.append(item.price)
+        return sku
+
+    def sku(self, item):
+        """
+        Finds the SKU of an interned item.
+
+        Parameters
+        ----------
+        item : FoodItem or Product
+            The item to look up.
+
+        Returns
+        -------
+        int
+            The SKU of the item.
+        """
+        try:
+            return self._skus[item]
+        except KeyError:
+            raise KeyError(f"{item.name} is not in the catalog.") from None
+
+    def item(self, sku):
+        """
+        Returns the interned item for a SKU.
+
+        Parameters
+        ----------
+        sku : int
+            The SKU to look up.
+
+        Returns
+        -------
+        FoodItem or Product
+            The canonical item object.
+        """
+        return self._items[sku]
+
+    def to_counts(self, mapping):
+        """
+        Converts an item to quantity mapping into a SKU to quantity mapping.
+
+        Items that are not yet in the catalog are interned.
+
+        Parameters
+        ----------
+        mapping : dict
+            Dictionary containing items and their quantities.
+
+        Returns
+        -------
+        dict
+            Dictionary containing SKUs and their quantities.
+        """
+        counts = {}
+        for item, quantity in mapping.items():
+            sku = self.add(item)
+            counts[sku] = counts.get(sku, 0) + quantity
+        return counts
+
+    def total_price(self, counts):
+        """
+        Calculates the total price of a SKU to quantity mapping.
+
+        Parameters
+        ----------
+        counts : dict
+            Dictionary containing SKUs and their quantities.
+
+        Returns
+        -------
+        float
+            The total price.
+        """
+        prices = self.prices
+        return sum(prices[sku] * quantity for sku, quantity in counts.items())
+
+
+def _restore_catalog(items, prices):
+    catalog = Catalog()
+    catalog._items = items
+    catalog._skus = {item: sku for sku, item in enumerate(items)}
+    catalog.prices.frombytes(prices)
+    return catalog
+
+
+def measure_item_memory(make_item, count=100_000):
+    """
+    Measures the memory allocated per item by an item factory.
+
+    Parameters
+    ----------
+    make_item : callable
+        Called with an index, returns a new item.
+    count : int, optional
+        Number of items to create, by default 100_000.
+
+    Returns
+    -------
+    float
+        Average number of bytes allocated per item.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = [make_item(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # the list itself is not part of the per-item cost
+    list_size = items.__sizeof__()
+    return (after - before - list_size) / count
+
+
+if __name__ == "__main__":
+    from ecommerce import Product
+    from food_delivery_system import FoodItem
+
+    class DictFoodItem:
+        def __init__(self, name, price):
+            self.name = name
+            self.price = price
+
+    names = [f"Item {i}" for i in range(100_000)]
+    benchmarks = {
+        "FoodItem (__dict__)": lambda i: DictFoodItem(names[i], 10.0),
+        "FoodItem (__slots__)": lambda i: FoodItem(names[i], 10.0),
+        "Product (__slots__)": lambda i: Product(names[i], 10.0, 1),
+    }
+    for label, make_item in benchmarks.items():
+        print(f"{label}: {measure_item_memory(make_item, len(names)):.1f} "
+              f"bytes per item")
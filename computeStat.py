@@ -1,5 +1,8 @@
 import numpy as np 
 
+from instrumentation import instrument
+
+@instrument("calculate_stat")
 def calculate_stat(data):
     """
     Calculate mean, median, and standard deviation of numerical data.
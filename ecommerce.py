@@ -4,6 +4,8 @@ System imitating Ecommerce System
 import logging
 import pdb
 
+from instrumentation import instrument
+
 # Configure logging
 logging.basicConfig(filename="ecommerce_logs.log", level=logging.INFO,
                     format="%(asctime)s:%(levelname)s:%(message)s")
@@ -21,12 +23,39 @@ class Product:
         The price of the product.
     quantity : int
         The quantity of the product.
+
+    Products are compared by name and price, so the quantity in stock
+    does not change which cart entry a product refers to. The name and
+    price cannot be changed after creation; create a new Product instead.
     """
+    __slots__ = ("name", "price", "quantity")
+
     def __init__(self, name, price, quantity):
         self.name = name
         self.price = price
         self.quantity = quantity
 
+    def __setattr__(self, name, value):
+        # changing a hashed field would lose the product in every cart
+        # holding it
+        if name != "quantity" and hasattr(self, name):
+            raise AttributeError(f"Cannot change the {name} of {self.name}.")
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, Product):
+            return NotImplemented
+        return self.name == other.name and self.price == other.price
+
+    def __hash__(self):
+        return hash((self.name, self.price))
+
+    def __reduce__(self):
+        return Product, (self.name, self.price, self.quantity)
+
+    def __repr__(self):
+        return f"Product({self.name!r}, {self.price!r}, {self.quantity!r})"
+
     def get_total_price(self):
         """
         Calculates the total price of the product based on its price
@@ -107,10 +136,15 @@ class ShoppingCart:
         else:
             logging.error(f"{product.name} not found in the cart.")
 
+    @instrument("ShoppingCart.get_total_cart_price")
     def get_total_cart_price(self):
         """
         Calculates the total price of all products in the shopping cart.
 
+        Each product is charged its price times its quantity in the cart.
+        The stock quantity of the product is not used, since equal
+        products with different stock share one cart entry.
+
         Returns
         -------
         float
@@ -118,7 +152,7 @@ class ShoppingCart:
         """
         total_price = 0
         for product, quantity in self.products.items():
-            total_price += product.get_total_price() * quantity
+            total_price += product.price * quantity
         return total_price
 
 
@@ -179,25 +213,26 @@ class Customer:
             print("Your cart is empty. Nothing to checkout.")
 
 
-# Test the e-commerce system
-product1 = Product("Keyboard", 50, 2)
-product2 = Product("Mouse", 30, 3)
+if __name__ == "__main__":
+    # Test the e-commerce system
+    product1 = Product("Keyboard", 50, 2)
+    product2 = Product("Mouse", 30, 3)
 
-customer = Customer("John Doe", "john.doe@example.com")
+    customer = Customer("John Doe", "john.doe@example.com")
 
-# Start debugging with pdb
-pdb.set_trace()
+    # Start debugging with pdb
+    pdb.set_trace()
 
-customer.add_to_cart(product1, 1)
-customer.add_to_cart(product2, 2)
-customer.checkout()
+    customer.add_to_cart(product1, 1)
+    customer.add_to_cart(product2, 2)
+    customer.checkout()
 
-try:
-    customer.add_to_cart(product1, -1)  # This should log an error
-except ValueError as e:
-    print(e)
+    try:
+        customer.add_to_cart(product1, -1)  # This should log an error
+    except ValueError as e:
+        print(e)
 
-try:
-    customer.remove_from_cart(product2, 3)  # This should log an error
-except ValueError as e:
-    print(e)
+    try:
+        customer.remove_from_cart(product2, 3)  # This should log an error
+    except ValueError as e:
+        print(e)
@@ -1,6 +1,12 @@
 """
 System that deals with food delivery and operations related to it
 """
+import math
+
+import numpy as np
+
+from catalog import Catalog
+from instrumentation import instrument
 
 
 class FoodItem:
@@ -13,11 +19,38 @@ class FoodItem:
         The name of the food item.
     price : float
         The price of the food item.
+
+    Food items are compared by value, so two items with the same name
+    and price are the same key in menus and carts. The name and price
+    cannot be changed after creation; create a new FoodItem instead.
     """
+    __slots__ = ("name", "price")
+
     def __init__(self, name, price):
         self.name = name
         self.price = price
 
+    def __setattr__(self, name, value):
+        # changing a hashed field would lose the item in every menu and
+        # cart holding it
+        if hasattr(self, name):
+            raise AttributeError(f"Cannot change the {name} of {self.name}.")
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodItem):
+            return NotImplemented
+        return self.name == other.name and self.price == other.price
+
+    def __hash__(self):
+        return hash((self.name, self.price))
+
+    def __reduce__(self):
+        return FoodItem, (self.name, self.price)
+
+    def __repr__(self):
+        return f"FoodItem({self.name!r}, {self.price!r})"
+
 
 class Restaurant:
     """
@@ -29,10 +62,15 @@ class Restaurant:
         The name of the restaurant.
     menu : dict
         Dictionary containing food items and their quantities on the menu.
+
+    The total revenue is kept up to date by ``add_to_menu`` and
+    ``remove_from_menu``, so reading it does not loop over the menu. Call
+    ``recalculate_revenue`` after changing ``menu`` directly.
     """
     def __init__(self, name):
         self.name = name
         self.menu = {}
+        self._revenue = 0
 
     def add_to_menu(self, food_item, quantity):
         """
@@ -49,6 +87,7 @@ class Restaurant:
             self.menu[food_item] += quantity
         else:
             self.menu[food_item] = quantity
+        self._revenue += food_item.price * quantity
 
     def remove_from_menu(self, food_item, quantity):
         """
@@ -63,9 +102,13 @@ class Restaurant:
         """
         if food_item in self.menu:
             if self.menu[food_item] <= quantity:
-                del self.menu[food_item]
+                self._revenue -= food_item.price * self.menu.pop(food_item)
             else:
                 self.menu[food_item] -= quantity
+                self._revenue -= food_item.price * quantity
+            # drop the rounding error left by float prices
+            if not self.menu:
+                self._revenue = 0
         else:
             print(f"{food_item.name} not found in the menu.")
 
@@ -78,10 +121,20 @@ class Restaurant:
         float
             The total revenue.
         """
-        total_revenue = 0
-        for food_item, quantity in self.menu.items():
-            total_revenue += food_item.price * quantity
-        return total_revenue
+        return self._revenue
+
+    def recalculate_revenue(self):
+        """
+        Recalculates the total revenue from the menu.
+
+        Returns
+        -------
+        float
+            The total revenue.
+        """
+        self._revenue = math.fsum(food_item.price * quantity
+                                  for food_item, quantity in self.menu.items())
+        return self._revenue
 
 
 class Customer:
@@ -140,6 +193,118 @@ class Customer:
             raise ValueError(f"{food_item.name} not found in the cart.")
 
 
+class MenuSnapshot:
+    """
+    Column snapshot of every menu line across a set of restaurants.
+
+    Attributes
+    ----------
+    restaurant_ids : numpy.ndarray
+        Index of the restaurant of each menu line.
+    item_ids : numpy.ndarray
+        Catalog SKU of the food item of each menu line.
+    prices : numpy.ndarray
+        Price of the food item of each menu line.
+    quantities : numpy.ndarray
+        Quantity of the food item of each menu line.
+    num_restaurants : int
+        Number of restaurants in the snapshot.
+    num_items : int
+        Number of distinct food items known to the catalog.
+    """
+    def __init__(self, restaurant_ids, item_ids, prices, quantities,
+                 num_restaurants, num_items):
+        self.restaurant_ids = restaurant_ids
+        self.item_ids = item_ids
+        self.prices = prices
+        self.quantities = quantities
+        self.num_restaurants = num_restaurants
+        self.num_items = num_items
+
+    def _group_ids(self, by):
+        if by == "restaurant":
+            return self.restaurant_ids, self.num_restaurants
+        if by == "item":
+            return self.item_ids, self.num_items
+        raise ValueError(f"Cannot group by {by!r}, use 'restaurant' or 'item'.")
+
+    def revenue_by(self, by="restaurant"):
+        """
+        Calculates the total revenue per restaurant or per food item.
+
+        Parameters
+        ----------
+        by : str, optional
+            Either "restaurant" or "item", by default "restaurant".
+
+        Returns
+        -------
+        numpy.ndarray
+            Revenue indexed by restaurant index or item SKU.
+        """
+        ids, size = self._group_ids(by)
+        return np.bincount(ids, weights=self.prices * self.quantities,
+                           minlength=size)
+
+    def stock_by(self, by="restaurant"):
+        """
+        Calculates the total quantity on the menus per restaurant or
+        per food item.
+
+        Parameters
+        ----------
+        by : str, optional
+            Either "restaurant" or "item", by default "restaurant".
+
+        Returns
+        -------
+        numpy.ndarray
+            Quantity indexed by restaurant index or item SKU.
+        """
+        ids, size = self._group_ids(by)
+        return np.bincount(ids, weights=self.quantities,
+                           minlength=size).astype(np.int64)
+
+    def top_items(self, k, restaurant_id=None):
+        """
+        Finds the food items with the highest revenue.
+
+        Parameters
+        ----------
+        k : int
+            Number of items to return.
+        restaurant_id : int, optional
+            Only count the menu of this restaurant, by default all
+            restaurants.
+
+        Returns
+        -------
+        list of tuple
+            (item SKU, revenue) pairs sorted by descending revenue, ties
+            by ascending SKU.
+        """
+        if restaurant_id is None:
+            item_ids, revenue = self.item_ids, self.prices * self.quantities
+        else:
+            mask = self.restaurant_ids == restaurant_id
+            item_ids = self.item_ids[mask]
+            revenue = self.prices[mask] * self.quantities[mask]
+        totals = np.bincount(item_ids, weights=revenue,
+                             minlength=self.num_items)
+        present = np.flatnonzero(np.bincount(item_ids,
+                                             minlength=self.num_items))
+        k = min(k, len(present))
+        if k <= 0:
+            return []
+        present_totals = totals[present]
+        # keep every item tied with the k-th so ties go to the lowest SKU
+        kth = np.partition(present_totals, len(present) - k)[len(present) - k]
+        candidates = np.flatnonzero(present_totals >= kth)
+        top = candidates[np.argsort(-present_totals[candidates],
+                                    kind="stable")][:k]
+        return [(int(present[i]), float(present_totals[i])) for i in top]
+
+
 class DeliveryService:
     """
     Represents a delivery service that manages restaurants.
@@ -148,9 +313,12 @@ class DeliveryService:
     ----------
     restaurants : list
         List of restaurants managed by the delivery service.
+    catalog : Catalog
+        Catalog assigning a SKU to every food item seen on a menu.
     """
     def __init__(self):
         self.restaurants = []
+        self.catalog = Catalog()
 
     def add_restaurant(self, restaurant):
         """
@@ -163,6 +331,7 @@ class DeliveryService:
         """
         self.restaurants.append(restaurant)
 
+    @instrument("DeliveryService.find_restaurant_by_name")
     def find_restaurant_by_name(self, name):
         """
         Finds a restaurant by its name.
@@ -182,47 +351,91 @@ class DeliveryService:
                 return restaurant
         return None
 
+    def get_total_revenue(self):
+        """
+        Calculates the total revenue of all restaurants from their
+        revenue counters.
 
-# Test the food delivery system
-restaurant1 = Restaurant("Tasty Bites")
-restaurant2 = Restaurant("Spice Delight")
-
-food_item1 = FoodItem("Burger", 8)
-food_item2 = FoodItem("Pizza", 12)
-food_item3 = FoodItem("Pasta", 10)
-
-restaurant1.add_to_menu(food_item1, 10)
-restaurant1.add_to_menu(food_item2, 5)
-
-restaurant2.add_to_menu(food_item2, 8)
-restaurant2.add_to_menu(food_item3, 12)
-
-customer = Customer("Alice", "123 Main St.")
-customer.add_to_cart(food_item1, 2)
-customer.add_to_cart(food_item2, 3)
-
-delivery_service = DeliveryService()
-delivery_service.add_restaurant(restaurant1)
-delivery_service.add_restaurant(restaurant2)
-
-try:
-    # This should raise a ValueError
-    customer.add_to_cart(food_item3, -2)
-except ValueError as e:
-    print(e)
-
-try:
-    # This should raise a ValueError
-    restaurant1.remove_from_menu(food_item2, 6)
-except ValueError as e:
-    print(e)
+        Returns
+        -------
+        float
+            The total revenue.
+        """
+        return sum(restaurant.get_total_revenue()
+                   for restaurant in self.restaurants)
 
-try:
-    # This should raise a ValueError
-    restaurant2.remove_from_menu(food_item1, 1)
-except ValueError as e:
-    print(e)
+    def snapshot_menus(self):
+        """
+        Copies the menus of all restaurants into NumPy arrays.
 
-print("Total revenue for Tasty Bites:", restaurant1.get_total_revenue())
-print("Total revenue for Spice Delight:", restaurant2.get_total_revenue())
+        Restaurants are identified by their index in ``restaurants`` and
+        food items by their SKU in ``catalog``.
 
+        Returns
+        -------
+        MenuSnapshot
+            The snapshot of all menu lines.
+        """
+        num_lines = sum(len(restaurant.menu) for restaurant in self.restaurants)
+        restaurant_ids = np.empty(num_lines, dtype=np.int64)
+        item_ids = np.empty(num_lines, dtype=np.int64)
+        quantities = np.empty(num_lines, dtype=np.int64)
+        add_item = self.catalog.add
+        start = 0
+        for restaurant_id, restaurant in enumerate(self.restaurants):
+            menu = restaurant.menu
+            end = start + len(menu)
+            restaurant_ids[start:end] = restaurant_id
+            item_ids[start:end] = np.fromiter(map(add_item, menu),
+                                              dtype=np.int64, count=len(menu))
+            quantities[start:end] = np.fromiter(menu.values(),
+                                                dtype=np.int64, count=len(menu))
+            start = end
+        prices = np.frombuffer(self.catalog.prices, dtype=np.float64)[item_ids]
+        return MenuSnapshot(restaurant_ids, item_ids, prices, quantities,
+                            len(self.restaurants), len(self.catalog))
+
+
+if __name__ == "__main__":
+    # Test the food delivery system
+    restaurant1 = Restaurant("Tasty Bites")
+    restaurant2 = Restaurant("Spice Delight")
+
+    food_item1 = FoodItem("Burger", 8)
+    food_item2 = FoodItem("Pizza", 12)
+    food_item3 = FoodItem("Pasta", 10)
+
+    restaurant1.add_to_menu(food_item1, 10)
+    restaurant1.add_to_menu(food_item2, 5)
+
+    restaurant2.add_to_menu(food_item2, 8)
+    restaurant2.add_to_menu(food_item3, 12)
+
+    customer = Customer("Alice", "123 Main St.")
+    customer.add_to_cart(food_item1, 2)
+    customer.add_to_cart(food_item2, 3)
+
+    delivery_service = DeliveryService()
+    delivery_service.add_restaurant(restaurant1)
+    delivery_service.add_restaurant(restaurant2)
+
+    try:
+        # This should raise a ValueError
+        customer.add_to_cart(food_item3, -2)
+    except ValueError as e:
+        print(e)
+
+    try:
+        # This should raise a ValueError
+        restaurant1.remove_from_menu(food_item2, 6)
+    except ValueError as e:
+        print(e)
+
+    try:
+        # This should raise a ValueError
+        restaurant2.remove_from_menu(food_item1, 1)
+    except ValueError as e:
+        print(e)
+
+    print("Total revenue for Tasty Bites:", restaurant1.get_total_revenue())
+    print("Total revenue for Spice Delight:", restaurant2.get_total_revenue())
@@ -0,0 +1,491 @@
+"""
+Opt-in instrumentation of hot paths: call counts, latency histograms,
+bytes read and written, cache hits and a sampling profiler.
+
+Instrumentation is off unless ``enable()`` is called or the
+``METRICS_ENABLED`` environment variable is set to 1. While it is off, an
+instrumented function costs one extra call and one flag check.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+BYTES_READ = "bytes_read"
+BYTES_WRITTEN = "bytes_written"
+CACHE_HITS = "cache_hits"
+CACHE_MISSES = "cache_misses"
+
+_enabled = os.environ.get("METRICS_ENABLED") == "1"
+
+
+def enable():
+    """
+    Turns instrumentation on.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Turns instrumentation off.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """
+    Tells whether instrumentation is on.
+
+    Returns
+    -------
+    bool
+        True if metrics are being recorded.
+    """
+    return _enabled
+
+
+def _bucket_index(value):
+    # values below SUB_BUCKETS get a bucket each, larger values get
+    # SUB_BUCKETS buckets per power of two, like an HDR histogram
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return ((shift + 1) << SUB_BUCKET_BITS) + (value >> shift) - SUB_BUCKETS
+
+
+def _bucket_upper_bound(index):
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (SUB_BUCKETS - 1)) + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """
+    Latency histogram with log-linear buckets of about 12% relative width.
+
+    Attributes
+    ----------
+    count : int
+        Number of recorded values.
+    total : int
+        Sum of the recorded values in nanoseconds.
+    max : int
+        Largest recorded value in nanoseconds.
+    buckets : Counter
+        Number of values per bucket index.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = Counter()
+
+    def record(self, value):
+        """
+        Records one latency.
+
+        Parameters
+        ----------
+        value : int
+            The latency in nanoseconds.
+        """
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self.buckets[_bucket_index(value)] += 1
+
+    def quantile(self, q):
+        """
+        Estimates a quantile from the buckets.
+
+        Parameters
+        ----------
+        q : float
+            The quantile, between 0 and 1.
+
+        Returns
+        -------
+        int
+            Upper bound in nanoseconds of the bucket holding the quantile.
+        """
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def last_index(self):
+        """
+        Returns the largest bucket index holding a value.
+
+        Returns
+        -------
+        int
+            The bucket index, -1 if the histogram is empty.
+        """
+        return max(self.buckets, default=-1)
+
+    def cumulative_buckets(self, last_index=None):
+        """
+        Returns the cumulative counts used by Prometheus histograms.
+
+        Parameters
+        ----------
+        last_index : int, optional
+            Return every bucket from index 0 up to this one, so series
+            share one layout. By default only buckets holding values.
+
+        Returns
+        -------
+        list of tuple
+            (upper bound in nanoseconds, number of values up to it) pairs.
+        """
+        if last_index is None:
+            indexes = sorted(self.buckets)
+        else:
+            indexes = range(last_index + 1)
+        result = []
+        seen = 0
+        for index in indexes:
+            seen += self.buckets.get(index, 0)
+            result.append((_bucket_upper_bound(index), seen))
+        return result
+
+
+class Metrics:
+    """
+    Registry of latency histograms and counters keyed by operation name.
+
+    Attributes
+    ----------
+    histograms : dict
+        Operation names mapped to their latency Histogram.
+    counters : Counter
+        Counts keyed by (counter, operation name), e.g.
+        ("bytes_read", "load_students").
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.counters = Counter()
+        self._last_index = -1
+        self._lock = threading.Lock()
+
+    def observe(self, name, nanoseconds):
+        """
+        Records the latency of one call.
+
+        Parameters
+        ----------
+        name : str
+            Name of the operation.
+        nanoseconds : int
+            Latency of the call.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(nanoseconds)
+
+    def increment(self, counter, name, amount=1):
+        """
+        Adds to a counter.
+
+        Parameters
+        ----------
+        counter : str
+            The counter, e.g. BYTES_READ or CACHE_HITS.
+        name : str
+            Name of the operation.
+        amount : int, optional
+            Amount to add, by default 1.
+        """
+        with self._lock:
+            self.counters[counter, name] += amount
+
+    def reset(self):
+        """
+        Drops every recorded metric.
+        """
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self._last_index = -1
+
+    def to_dict(self):
+        """
+        Returns a JSON-serializable snapshot of the metrics.
+
+        Returns
+        -------
+        dict
+            Latency summaries and counters per operation.
+        """
+        with self._lock:
+            snapshot = {}
+            for name, histogram in self.histograms.items():
+                snapshot.setdefault(name, {}).update({
+                    "calls": histogram.count,
+                    "total_ns": histogram.total,
+                    "max_ns": histogram.max,
+                    "p50_ns": histogram.quantile(0.5),
+                    "p90_ns": histogram.quantile(0.9),
+                    "p99_ns": histogram.quantile(0.99),
+                    "buckets": {str(bound): count for bound, count
+                                in histogram.cumulative_buckets()},
+                })
+            for (counter, name), value in self.counters.items():
+                snapshot.setdefault(name, {})[counter] = value
+        return snapshot
+
+    def to_prometheus(self, prefix="app"):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Every histogram lists the same buckets, from the smallest up to
+        the largest one holding a value in any histogram, so series can
+        be aggregated by ``le``. The layout only grows between scrapes.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Prefix of every metric name, by default "app".
+
+        Returns
+        -------
+        str
+            The metrics text.
+        """
+        lines = []
+        with self._lock:
+            metric = f"{prefix}_call_latency_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            self._last_index = max(
+                [self._last_index] + [histogram.last_index() for histogram
+                                      in self.histograms.values()])
+            for name, histogram in sorted(self.histograms.items()):
+                label = f'name="{_escape(name)}"'
+                for bound, count in histogram.cumulative_buckets(
+                        self._last_index):
+                    lines.append(f'{metric}_bucket{{{label},le="{bound / 1e9:.9g}"}} '
+                                 f"{count}")
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} '
+                             f"{histogram.count}")
+                lines.append(f"{metric}_sum{{{label}}} {histogram.total / 1e9:.9g}")
+                lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+            for counter in sorted({counter for counter, _ in self.counters}):
+                metric = f"{prefix}_{counter}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (other, name), value in sorted(self.counters.items()):
+                    if other == counter:
+                        lines.append(f'{metric}{{name="{_escape(name)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+def count(counter, name, amount=1):
+    """
+    Adds to a counter of the global registry if instrumentation is on.
+
+    Parameters
+    ----------
+    counter : str
+        The counter, e.g. BYTES_READ or CACHE_HITS.
+    name : str
+        Name of the operation.
+    amount : int, optional
+        Amount to add, by default 1.
+    """
+    if _enabled:
+        METRICS.increment(counter, name, amount)
+
+
+def instrument(name=None):
+    """
+    Decorator recording the call count and latency of a function.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the operation, by default the qualified function name.
+
+    Returns
+    -------
+    callable
+        The decorator.
+    """
+    def decorator(func):
+        operation = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.observe(operation, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+class timer:
+    """
+    Context manager recording the latency of a block of code.
+
+    Parameters
+    ----------
+    name : str
+        Name of the operation.
+    """
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if _enabled:
+            self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._start is not None:
+            METRICS.observe(self.name, time.perf_counter_ns() - self._start)
+            self._start = None
+        return False
+
+
+def _write_atomically(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_prometheus(path, prefix="app"):
+    """
+    Writes the global metrics to a file for the Prometheus textfile
+    collector.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file, usually ending in ".prom".
+    prefix : str, optional
+        Prefix of every metric name, by default "app".
+    """
+    _write_atomically(path, METRICS.to_prometheus(prefix))
+
+
+def write_json(path):
+    """
+    Writes a JSON snapshot of the global metrics.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    """
+    _write_atomically(path, json.dumps(METRICS.to_dict(), indent=4))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all other threads at a fixed interval.
+
+    The samples are written in the collapsed stack format read by
+    flamegraph.pl and speedscope. Use it as a context manager around a
+    load test.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Seconds between samples, by default 0.005.
+
+    Attributes
+    ----------
+    stacks : Counter
+        Number of samples per collapsed stack.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def start(self):
+        """
+        Starts sampling in a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="sampling-profiler")
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:"
+                                 f"{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        """
+        Writes the samples in collapsed stack format.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, samples in self.stacks.most_common():
+                file.write(f"{stack} {samples}\n")
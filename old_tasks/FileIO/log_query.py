@@ -0,0 +1,338 @@
+"""
+Parse structured log files into columns and query them by level and
+time range.
+
+Log files are written in time order, so the start of a time range is
+found by binary search over byte offsets instead of reading the file
+from the beginning.
+"""
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+
+class LogFormat:
+    """
+    Describes how to parse one line of a log file.
+
+    Attributes
+    ----------
+    name : str
+        Name of the format.
+    pattern : re.Pattern
+        Regular expression with named groups ``level`` and ``message``,
+        and optionally ``asctime`` and ``logger``.
+    parse_time : callable or None
+        Converts the ``asctime`` group to a datetime, None if the format
+        has no timestamps.
+    """
+    def __init__(self, name, pattern, parse_time=datetime.fromisoformat):
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.parse_time = parse_time if "asctime" in self.pattern.groupindex \
+            else None
+
+    def parse(self, line):
+        """
+        Parses one log line.
+
+        Parameters
+        ----------
+        line : str
+            The line to parse, without the trailing newline.
+
+        Returns
+        -------
+        tuple or None
+            (timestamp, level, logger, message) if the line matches,
+            otherwise None. Missing fields are None.
+        """
+        match = self.pattern.match(line)
+        if match is None:
+            return None
+        fields = match.groupdict()
+        timestamp = None
+        if self.parse_time is not None:
+            try:
+                timestamp = self.parse_time(fields["asctime"])
+            except ValueError:
+                return None
+        return timestamp, fields["level"], fields.get("logger"), \
+            fields["message"]
+
+
+# the comma before the milliseconds of logging's default asctime is only
+# accepted by datetime.fromisoformat from Python 3.11
+ASCTIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+ASCTIME_SECONDS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_asctime(text):
+    """
+    Parses a timestamp in the default asctime format of logging.
+
+    Parameters
+    ----------
+    text : str
+        The timestamp, e.g. "2024-04-15 17:55:31,701". The milliseconds
+        may be left out.
+
+    Returns
+    -------
+    datetime
+        The parsed timestamp.
+    """
+    if "," in text:
+        return datetime.strptime(text, ASCTIME_FORMAT)
+    return datetime.strptime(text, ASCTIME_SECONDS_FORMAT)
+
+
+FORMATS = {}
+
+
+def register_format(log_format):
+    """
+    Registers a log format so that ``detect_format`` can find it.
+
+    Parameters
+    ----------
+    log_format : LogFormat
+        The format to register.
+    """
+    FORMATS[log_format.name] = log_format
+
+
+# ecommerce_logs.log: asctime:LEVEL:message
+register_format(LogFormat(
+    "ecommerce",
+    r"(?P<asctime>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}):(?P<level>[A-Z]+):"
+    r"(?P<message>.*)",
+    parse_asctime))
+# PasswordStrengthChecker.log: [asctime] - [LEVEL] - message
+register_format(LogFormat(
+    "password_strength",
+    r"\[(?P<asctime>[^\]]+)\] - \[(?P<level>[A-Z]+)\] - (?P<message>.*)",
+    parse_asctime))
+# logfile.txt: asctime - LEVEL - message
+register_format(LogFormat(
+    "plain",
+    r"(?P<asctime>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:,\d{3})?) - "
+    r"(?P<level>[A-Z]+) - (?P<message>.*)",
+    parse_asctime))
+# records.log and events.log: LEVEL:logger:message
+register_format(LogFormat(
+    "basic",
+    r"(?P<level>[A-Z]+):(?P<logger>[^:]*):(?P<message>.*)"))
+
+
+class LogRecords:
+    """
+    Parsed log records stored column by column.
+
+    Attributes
+    ----------
+    timestamps : list
+        Timestamp of each record, None if the format has none.
+    levels : list
+        Level name of each record.
+    loggers : list
+        Logger name of each record, None if the format has none.
+    messages : list
+        Message of each record.
+    """
+    def __init__(self):
+        self.timestamps = []
+        self.levels = []
+        self.loggers = []
+        self.messages = []
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, record):
+        """
+        Appends one (timestamp, level, logger, message) record.
+
+        Parameters
+        ----------
+        record : tuple
+            The record to append.
+        """
+        timestamp, level, logger, message = record
+        self.timestamps.append(timestamp)
+        self.levels.append(level)
+        self.loggers.append(logger)
+        self.messages.append(message)
+
+
+def detect_format(logfile, max_lines=20):
+    """
+    Finds the registered format matching the first lines of a log file.
+
+    Parameters
+    ----------
+    logfile : str
+        Path of the log file.
+    max_lines : int, optional
+        Number of lines to try, by default 20.
+
+    Returns
+    -------
+    LogFormat
+        The first format that parses one of the lines.
+    """
+    with open(logfile, "r", encoding="utf-8", errors="replace") as file:
+        for _, line in zip(range(max_lines), file):
+            line = line.rstrip("\n")
+            for log_format in FORMATS.values():
+                if log_format.parse(line) is not None:
+                    return log_format
+    raise ValueError(f"No known log format matches {logfile}")
+
+
+def _record_at(file, offset, log_format):
+    """
+    Finds the first parsable record starting at or after a byte offset.
+
+    Returns the offset of its line and its timestamp, or (None, None).
+    """
+    if offset > 0:
+        # land on the start of the next line, or stay if offset is one
+        file.seek(offset - 1)
+        file.readline()
+    else:
+        file.seek(0)
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line:
+            return None, None
+        record = log_format.parse(
+            line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        if record is not None:
+            return position, record[0]
+
+
+def find_offset(logfile, timestamp, log_format=None):
+    """
+    Finds the byte offset of the first record at or after a timestamp.
+
+    Parameters
+    ----------
+    logfile : str
+        Path of a time-ordered log file.
+    timestamp : datetime
+        The timestamp to look for.
+    log_format : LogFormat, optional
+        Format of the file, detected if not given.
+
+    Returns
+    -------
+    int
+        Offset of the line of the first matching record, or the file
+        size if every record is older.
+    """
+    log_format = log_format or detect_format(logfile)
+    if log_format.parse_time is None:
+        raise ValueError(f"The {log_format.name} format has no timestamps.")
+    size = os.path.getsize(logfile)
+    with open(logfile, "rb") as file:
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            position, record_time = _record_at(file, middle, log_format)
+            if position is None or record_time >= timestamp:
+                high = middle
+            else:
+                low = middle + 1
+        position, _ = _record_at(file, low, log_format)
+    return size if position is None else position
+
+
+def iter_records(logfile, log_format=None, levels=None, start=None, end=None):
+    """
+    Streams the parsed records of a log file.
+
+    Parameters
+    ----------
+    logfile : str
+        Path of the log file.
+    log_format : LogFormat, optional
+        Format of the file, detected if not given.
+    levels : iterable of str, optional
+        Only yield records with one of these levels, by default all.
+    start : datetime, optional
+        Only yield records at or after this time.
+    end : datetime, optional
+        Only yield records before this time.
+
+    Yields
+    ------
+    tuple
+        (timestamp, level, logger, message) records.
+    """
+    log_format = log_format or detect_format(logfile)
+    if (start or end) and log_format.parse_time is None:
+        raise ValueError(f"The {log_format.name} format has no timestamps.")
+    levels = {level.upper() for level in levels} if levels else None
+    offset = find_offset(logfile, start, log_format) if start else 0
+    with open(logfile, "rb") as file:
+        file.seek(offset)
+        for line in file:
+            record = log_format.parse(
+                line.decode("utf-8", errors="replace").rstrip("\r\n"))
+            if record is None:
+                continue
+            if end is not None and record[0] >= end:
+                break
+            if levels is None or record[1] in levels:
+                yield record
+
+
+def query_log(logfile, log_format=None, levels=None, start=None, end=None):
+    """
+    Reads the records of a log file matching a level and time filter.
+
+    Parameters are the same as for ``iter_records``.
+
+    Returns
+    -------
+    LogRecords
+        The matching records.
+    """
+    records = LogRecords()
+    for record in iter_records(logfile, log_format, levels, start, end):
+        records.append(record)
+    return records
+
+
+def count_by_level_per_minute(logfile, log_format=None, start=None, end=None):
+    """
+    Counts the records per level in every minute of a log file.
+
+    Parameters
+    ----------
+    logfile : str
+        Path of the log file.
+    log_format : LogFormat, optional
+        Format of the file, detected if not given.
+    start : datetime, optional
+        Only count records at or after this time.
+    end : datetime, optional
+        Only count records before this time.
+
+    Returns
+    -------
+    Counter
+        Counts keyed by (minute, level), where minute is a datetime
+        truncated to the minute.
+    """
+    log_format = log_format or detect_format(logfile)
+    if log_format.parse_time is None:
+        raise ValueError(f"The {log_format.name} format has no timestamps.")
+    counts = Counter()
+    for timestamp, level, _, _ in iter_records(logfile, log_format,
+                                               start=start, end=end):
+        counts[timestamp.replace(second=0, microsecond=0), level] += 1
+    return counts
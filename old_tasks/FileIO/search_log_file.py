@@ -1,13 +1,21 @@
 """
 Create a function search_log that takes a log file and a search keyword as input.
 The function should find and display all lines containing the search keyword.
+
+Run from the repository root with python -m old_tasks.FileIO.search_log_file.
+Running python search_log_file.py from this directory fails with an
+ImportError, since instrumentation.py is only found from the root.
 """
 import logging
 import logging.config
+import os
+
+from instrumentation import BYTES_READ, count, instrument, is_enabled
 
 # default level is WARNING
 logging.basicConfig(filename='events.log', level = logging.INFO)
 
+@instrument("search_log")
 def search_log(logfile, keyword):
     """
     Checks for the presence of the keyword in a particular logfile
@@ -25,14 +33,20 @@ def search_log(logfile, keyword):
                     print('logging done %d', index)
                     output_list.append(f'Line no: {index}, Line: "{f}"')
                 index+=1
+            if is_enabled():
+                # bytes taken from the file, not the size of the file
+                count(BYTES_READ, "search_log", file.buffer.tell())
 
     except FileNotFoundError as e :
         logging.warning(e)
+        count(BYTES_READ, "search_log", 0)
     if len(output_list)==0:
         print('No matches found')
     return output_list
 
-all_results = search_log('logfile.txt', input("Enter the keyword to search: "))
+if __name__ == "__main__":
+    logfile = os.path.join(os.path.dirname(__file__), 'logfile.txt')
+    all_results = search_log(logfile, input("Enter the keyword to search: "))
 
-for res in all_results:
-    print(res)
+    for res in all_results:
+        print(res)